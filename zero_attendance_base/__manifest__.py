@@ -16,6 +16,8 @@
     'website': "https://www.erpzero.com",
     'email': "sales@erpzero.com",
     'data': [
+        'security/ir.model.access.csv',
+        'data/ir_cron.xml',
     ],
     'images': ['static/description/logo.PNG'],
     'installable': True,
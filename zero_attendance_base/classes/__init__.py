@@ -1,2 +1,3 @@
 from . import analyzed_interval
-from . import analyzed_period
\ No newline at end of file
+from . import analyzed_period
+from . import day_bucketing
@@ -2,9 +2,10 @@ from .analyzed_period import BaseAnalyzedPeriod
 
 
 class AnalyzedInterval(BaseAnalyzedPeriod):
-    def __init__(self, state, interval, covering_leave=None):
+    def __init__(self, state, interval, covering_leave=None, day=None):
         self.interval = interval
-        self.date_of_interval = interval[0].date()
+        # The workday the interval belongs to, which differs from its UTC date for night shifts
+        self.date_of_interval = day or interval[0].date()
         period_in_minutes = round(self.duration / 60.0, 2)
         super(AnalyzedInterval, self).__init__(self.date_of_interval, state, period_in_minutes, covering_leave)
 
@@ -0,0 +1,149 @@
+from bisect import bisect_right
+from datetime import datetime, time
+
+import pytz
+
+
+class DayBucketing(object):
+    """
+    Buckets naive UTC datetimes (as stored by Odoo) by the local day of a timezone.
+
+    The UTC offset transitions of the timezone are looked up once per instance and the UTC boundaries of every
+    local day are cached, so a whole analysis batch is converted without touching pytz per datetime.
+    """
+    _instances = {}
+
+    def __init__(self, tz_name):
+        self.tz_name = tz_name or 'UTC'
+        self.tz = pytz.timezone(self.tz_name)
+        # DstTzInfo timezones expose their offset transitions, static ones have a single fixed offset
+        transition_times = getattr(self.tz, '_utc_transition_times', None)
+        if transition_times:
+            self._transition_times = transition_times
+            self._offsets = [info[0] for info in self.tz._transition_info]
+        else:
+            self._transition_times = [datetime.min]
+            self._offsets = [self.tz.utcoffset(datetime.min)]
+        self._day_bounds = {}
+
+    @classmethod
+    def get(cls, tz_name):
+        """
+        Gets the shared instance of :param tz_name: so that its caches live across analysis batches
+        :param str tz_name:
+        :return DayBucketing:
+        """
+        tz_name = tz_name or 'UTC'
+        if tz_name not in cls._instances:
+            cls._instances[tz_name] = cls(tz_name)
+        return cls._instances[tz_name]
+
+    def utc_offset(self, utc_datetime):
+        """
+        :param datetime.datetime utc_datetime: naive UTC datetime
+        :return datetime.timedelta: UTC offset of the timezone at :param utc_datetime:
+        """
+        idx = bisect_right(self._transition_times, utc_datetime) - 1
+        return self._offsets[max(idx, 0)]
+
+    def to_local(self, utc_datetime):
+        """
+        :param datetime.datetime utc_datetime: naive UTC datetime
+        :return datetime.datetime: naive local datetime
+        """
+        return utc_datetime + self.utc_offset(utc_datetime)
+
+    def local_day(self, utc_datetime):
+        """
+        :param datetime.datetime utc_datetime: naive UTC datetime
+        :return datetime.date: local day of :param utc_datetime:
+        """
+        return self.to_local(utc_datetime).date()
+
+    def day_ordinal(self, utc_datetime):
+        return self.local_day(utc_datetime).toordinal()
+
+    def day_bounds(self, day):
+        """
+        Gets the UTC boundaries of the local :param day:, the stop boundary is the start of the next day.
+        :param datetime.date day:
+        :return (<datetime.datetime> start, <datetime.datetime> stop): naive UTC datetimes
+        """
+        ordinal = day.toordinal()
+        if ordinal not in self._day_bounds:
+            self._day_bounds[ordinal] = (self._local_midnight_to_utc(ordinal),
+                                         self._local_midnight_to_utc(ordinal + 1))
+        return self._day_bounds[ordinal]
+
+    def _local_midnight_to_utc(self, ordinal):
+        local_midnight = datetime.combine(datetime.fromordinal(ordinal).date(), time(0, 0, 0))
+        return self.tz.localize(local_midnight, is_dst=False).astimezone(pytz.utc).replace(tzinfo=None)
+
+    def split_by_day(self, interval):
+        """
+        Splits :param interval: at the local midnights it crosses.
+        :param (datetime.datetime, datetime.datetime) interval: naive UTC datetimes
+        :return [(<datetime.date> local_day, <datetime.datetime> start, <datetime.datetime> stop), ]:
+        """
+        start, stop = interval[0], interval[1]
+        pieces = []
+        while start < stop:
+            day = self.local_day(start)
+            day_stop = self.day_bounds(day)[1]
+            pieces.append((day, start, min(stop, day_stop)))
+            start = day_stop
+        return pieces
+
+    @staticmethod
+    def bucket_intervals(intervals, windows, clip=True):
+        """
+        Distributes :param intervals: over the disjoint and sorted :param windows: in a single pass.
+
+        :param [(datetime.datetime, datetime.datetime, ...), ] intervals:
+        :param [(datetime.datetime, datetime.datetime), ] windows:
+        :param bool clip: whether to cut the intervals at the window boundaries or keep them as they are
+        :return [[(datetime.datetime, datetime.datetime, ...), ], ]: intervals overlapping each window
+        """
+        buckets = [[] for _window in windows]
+        window_starts = [window[0] for window in windows]
+        for interval in intervals:
+            idx = max(bisect_right(window_starts, interval[0]) - 1, 0)
+            while idx < len(windows) and windows[idx][0] < interval[1]:
+                window_start, window_stop = windows[idx]
+                if interval[0] < window_stop:
+                    if clip:
+                        buckets[idx].append((max(interval[0], window_start), min(interval[1], window_stop)) +
+                                            tuple(interval[2:]))
+                    else:
+                        buckets[idx].append(interval)
+                idx += 1
+        return buckets
+
+    def workday_windows(self, workday_intervals, previous_workday_intervals=None):
+        """
+        Builds one disjoint window per scheduled workday covering the whole local day, extended to cover its
+        scheduled intervals, so that the part of a cross-midnight shift after midnight belongs to its workday.
+
+        :param [(<datetime.date> day, [(datetime.datetime, datetime.datetime), ]), ] workday_intervals: sorted
+        :param (<datetime.date> day, [(datetime.datetime, datetime.datetime), ]) previous_workday_intervals:
+            the scheduled workday preceding :param workday_intervals:, only used to trim the first window so that
+            the windows don't depend on where the analyzed period starts
+        :return [(<datetime.datetime> start, <datetime.datetime> stop), ]: naive UTC windows
+        """
+        context = [previous_workday_intervals] if previous_workday_intervals else []
+        windows = []
+        previous_stop = None
+        for day, intervals in context + list(workday_intervals):
+            start, stop = self.day_bounds(day)
+            if intervals:
+                start = min([start] + [interval[0] for interval in intervals])
+                stop = max([stop] + [interval[1] for interval in intervals])
+            if previous_stop is not None:
+                start = max(start, previous_stop)
+                stop = max(start, stop)
+            windows.append((start, stop))
+            previous_stop = stop
+        return windows[len(context):]
+
+    def __repr__(self):
+        return 'DayBucketing(%s)' % self.tz_name
@@ -2,3 +2,5 @@ from . import hr_employee
 from . import hr_attendance
 from . import resource_calendar
 from . import hr_holidays_public
+from . import hr_attendance_ledger
+from . import resource_calendar_leaves
@@ -1,6 +1,9 @@
 import logging
 import pprint
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
 
 from dateutil import rrule
 from odoo import models, fields, _, exceptions, api
@@ -8,18 +11,67 @@ from odoo.tools import DEFAULT_SERVER_DATE_FORMAT
 
 from functools import reduce
 
+from ..classes.analyzed_interval import AnalyzedInterval
+from ..classes.analyzed_period import N_VE, P_VE, LEAVE_COVERED
+from ..classes.day_bucketing import DayBucketing
+
 LOGGER = logging.getLogger(__name__)
 
+# Count of employees whose analysis data is fetched at once in pipelined analysis
+PIPELINE_CHUNK_SIZE = 10
+# Count of fetched chunks allowed to wait for classification in pipelined analysis
+PIPELINE_MAX_QUEUED_CHUNKS = 2
+# Seconds the pipeline threads wait on the queue before checking whether the other thread is still there
+PIPELINE_QUEUE_TIMEOUT = 1
+
 
 class Attendance(models.Model):
     _inherit = 'hr.attendance'
 
+    @api.multi
+    def _get_ledger_days(self):
+        """
+        Gets the days touched by the attendance records grouped by employee
+        :return {<hr.employee> employee: {<datetime.date> day, }}:
+        """
+        ledger_model = self.env['hr.attendance.ledger']
+        employee_days = {}
+        for attendance in self:
+            days = ledger_model.get_days_of_interval(fields.Datetime.from_string(attendance.check_in),
+                                                     fields.Datetime.from_string(attendance.check_out))
+            employee_days.setdefault(attendance.employee_id, set()).update(days)
+        return employee_days
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        attendances = super(Attendance, self).create(vals_list)
+        self.env['hr.attendance.ledger'].update_ledger_days(attendances._get_ledger_days())
+        return attendances
+
+    @api.multi
+    def write(self, vals):
+        employee_days = self._get_ledger_days()
+        result = super(Attendance, self).write(vals)
+        for employee, days in self._get_ledger_days().items():
+            employee_days.setdefault(employee, set()).update(days)
+        self.env['hr.attendance.ledger'].update_ledger_days(employee_days)
+        return result
+
+    @api.multi
+    def unlink(self):
+        employee_days = self._get_ledger_days()
+        result = super(Attendance, self).unlink()
+        self.env['hr.attendance.ledger'].update_ledger_days(employee_days)
+        return result
+
     @api.model
     def get_attendance_dates(self, employee, date_from, date_to):
         """Get Attendance Days of an employee in a selected period.
 
-        :param date_from: start date of selected period (can be str or datetime object).
-        :param date_to: end date of selected period (can be str or datetime object).
+        Days are local days of the employee's timezone, shifts crossing a local midnight are split at it.
+
+        :param date_from: start date of selected period (can be str, date or datetime object).
+        :param date_to: end date of selected period (can be str, date or datetime object).
 
         :return list of tuples, each has the following structure contains datetime object of attendance
                 date (days) and float object number of hours logged in.
@@ -45,68 +97,95 @@ class Attendance(models.Model):
         >>> hours = sum([x[1] for x in attendance_model.get_attendance_dates('2019-01-01', '2019-01-31')])
         """
         if isinstance(date_from, str):
-            date_from_str = date_from
             date_from = fields.Date.from_string(date_from)
-        else:
-            date_from_str = fields.Date.to_string(date_from)
-
+        elif isinstance(date_from, datetime):
+            date_from = date_from.date()
         if isinstance(date_to, str):
-            date_to_str = date_to
             date_to = fields.Date.from_string(date_to)
-        else:
-            date_to_str = fields.Date.to_string(date_to)
+        elif isinstance(date_to, datetime):
+            date_to = date_to.date()
+
+        day_bucketing = self.get_day_bucketing(employee)
+        datetime_from = day_bucketing.day_bounds(date_from)[0]
+        datetime_to = day_bucketing.day_bounds(date_to)[1]
+        LOGGER.debug('Selected Period: %s - %s (%s)', date_from, date_to, day_bucketing)
 
-        # Get all recorded check-(in/out)s in the selected period of that employee.
-        # NOTE: Odoo by default doesn't accept Missing/Misdated checks.
-        checks = self.search([('check_in', '>=', date_from_str),
-                              ('check_in', '<=', date_to_str),
-                              ('employee_id', '=', employee.id)], order='check_in')
-        LOGGER.debug('Selected Period: %s - %s', date_from, date_to)
-        LOGGER.debug('Checks of the selected period: %s', checks)
         result = []
-        # Check-In Record of Previous check in the loop, default is None for the first time.
-        in_record = None
-        # Loop over the checks and record periods
-        for check in checks:
-            if check.check_out:
-                in_date = fields.Datetime.from_string(check.check_in)
-                out_date = fields.Datetime.from_string(check.check_out)
-
-                period_in_hours = round(check.worked_hours, 2)
-                period_in_days = round(period_in_hours / 24.0, 2)
-                if (0 < period_in_days < 1) and in_date.day == out_date.day:
-                    # Normal Check-in and Check-out on the same day
-                    result.append((out_date.date(), period_in_hours, in_date, out_date))
-                elif (0 < period_in_days < 1) and out_date.day != in_date.day:
-                    # Calculate multi-days check-ins
-                    # in-record period: is the period of the first day after the check-in
-                    in_record_period = (datetime(in_date.year, in_date.month, in_date.day,
-                                                 23, 59, 59) - in_date).total_seconds() / 60 / 60
-                    in_record_period = round(in_record_period, 2)
-                    result.append((in_date.date(), in_record_period, in_date,
-                                   datetime(in_date.year, in_date.month, in_date.day, 23, 59, 59)))
-                    # out-record period: is the period of the last day before the check-out
-                    out_record_period = out_date.hour + out_date.minute / 60.0 + out_date.second / 3600.0
-                    out_record_period = round(out_record_period, 2)
-                    result.append((out_date.date(), out_record_period,
-                                   datetime(out_date.year, out_date.month, out_date.day, 0, 0, 0),
-                                   out_date))
-                elif period_in_days >= 1.0:
-                    # No one works more than 24 hours consecutively
-                    in_date_str = fields.Datetime.to_string(in_date)
-                    out_date_str = fields.Datetime.to_string(out_date)
-                    raise exceptions.ValidationError(_("There's missing check-in/out between the date: %s and the "
-                                                       "date: %s. please check the attendance records before "
-                                                       "calculating the attendance." % (in_date_str, out_date_str)))
-                else:
-                    # We should not get here at all except if the checks are not ordered correctly.
-                    raise exceptions.ValidationError(_("Check-in record is not prior to the Check-out record."))
+        # Split the shifts at the local midnights they cross, each piece is recorded on its local day
+        for attendance_interval in self._get_attendance_intervals(employee, datetime_from, datetime_to):
+            for day, interval_start, interval_stop in day_bucketing.split_by_day(attendance_interval):
+                if date_from <= day <= date_to:
+                    period_in_hours = round((interval_stop - interval_start).total_seconds() / 60 / 60, 2)
+                    result.append((day, period_in_hours, interval_start, interval_stop))
 
         # Return Result
         LOGGER.debug("Count of Attendance Days: %s", len(result))
         LOGGER.debug("Attendance Days: \n%s", pprint.pformat(result))
         return result
 
+    @api.model
+    def get_day_bucketing(self, employee, work_schedule=None):
+        """
+        Gets the day bucketing of the timezone of :param employee:, falling back to the timezone of
+        :param work_schedule: then the current user's one.
+
+        :param hr.employee employee:
+        :param resource.calendar work_schedule:
+        :return DayBucketing:
+        """
+        tz_name = employee.tz or (work_schedule and work_schedule.tz) or self.env.user.tz
+        return DayBucketing.get(tz_name)
+
+    @api.model
+    def _get_attendance_intervals(self, employee, datetime_from, datetime_to):
+        """
+        Gets the closed attendance intervals of an employee that overlap the selected period.
+
+        :param hr.employee employee:
+        :param datetime.datetime datetime_from: naive UTC start of the selected period
+        :param datetime.datetime datetime_to: naive UTC end of the selected period
+        :return [(<datetime.datetime> check_in, <datetime.datetime> check_out), ]: sorted by check-in
+        """
+        return self._get_employees_attendance_intervals(employee, datetime_from, datetime_to).get(employee.id, [])
+
+    @api.model
+    def _get_employees_attendance_intervals(self, employees, datetime_from, datetime_to):
+        """
+        Gets the closed attendance intervals of many employees that overlap the selected period, with a single search.
+
+        :param hr.employee employees:
+        :param datetime.datetime datetime_from: naive UTC start of the selected period
+        :param datetime.datetime datetime_to: naive UTC end of the selected period
+        :return {<int> employee_id: [(<datetime.datetime> check_in, <datetime.datetime> check_out), ]}: sorted by
+                check-in
+        """
+        # Get all recorded check-(in/out)s in the selected period of those employees, checks that started
+        # a day earlier are fetched too as they may cross into the period.
+        # NOTE: Odoo by default doesn't accept Missing/Misdated checks.
+        checks = self.search([('check_in', '>=', fields.Datetime.to_string(datetime_from - timedelta(days=1))),
+                              ('check_in', '<', fields.Datetime.to_string(datetime_to)),
+                              ('employee_id', 'in', employees.ids)], order='check_in')
+        LOGGER.debug('Checks of the selected period: %s', checks)
+
+        result = {}
+        for check in checks.filtered('check_out'):
+            in_date = fields.Datetime.from_string(check.check_in)
+            out_date = fields.Datetime.from_string(check.check_out)
+            period_in_days = (out_date - in_date).total_seconds() / 60 / 60 / 24
+            if period_in_days >= 1.0:
+                # No one works more than 24 hours consecutively
+                in_date_str = fields.Datetime.to_string(in_date)
+                out_date_str = fields.Datetime.to_string(out_date)
+                raise exceptions.ValidationError(_("There's missing check-in/out between the date: %s and the "
+                                                   "date: %s. please check the attendance records before "
+                                                   "calculating the attendance." % (in_date_str, out_date_str)))
+            elif period_in_days <= 0:
+                # We should not get here at all except if the checks are not ordered correctly.
+                raise exceptions.ValidationError(_("Check-in record is not prior to the Check-out record."))
+            elif out_date > datetime_from:
+                result.setdefault(check.employee_id.id, []).append((in_date, out_date))
+        return result
+
     @api.model
     def generate_scheduled_workdays(self, work_schedule, date_from_str, date_to_str):
         _weekdays = work_schedule._get_weekdays()
@@ -145,34 +224,277 @@ class Attendance(models.Model):
                                                              :param date_from: to :param date_to:
         :return [AnalyzedInterval, ]:
         """
+        analysis_data = self._fetch_analysis_data(employee, work_schedule, date_from_str, date_to_str,
+                                                  include_leave_types, exclude_leave_types)
+        return self._classify_analysis_data(analysis_data)
+
+    @api.model
+    def _fetch_analysis_data(self, employee, work_schedule, date_from_str, date_to_str, include_leave_types=None,
+                             exclude_leave_types=None):
+        """
+        Fetches everything :meth:`analyze_attendance` needs from the database, as plain python objects so that
+        it can be fetched in a different thread/cursor than the one classifying it.
+
+        :return (<DayBucketing> day_bucketing,
+                 [(<datetime.date> day, [(datetime.datetime, datetime.datetime), ]), ] workday_intervals,
+                 [(datetime.datetime, datetime.datetime), ] windows,
+                 [(datetime.datetime, datetime.datetime), ] attendance_intervals,
+                 [(datetime.datetime, datetime.datetime), ] employee_leaves):
+        """
+        return self._fetch_chunk_analysis_data([(employee, work_schedule)], date_from_str, date_to_str,
+                                               include_leave_types, exclude_leave_types)[employee.id]
+
+    @api.model
+    def _fetch_chunk_analysis_data(self, employee_schedules, date_from_str, date_to_str, include_leave_types=None,
+                                   exclude_leave_types=None, public_holiday_dates=None):
+        """
+        Same as :meth:`_fetch_analysis_data` for a chunk of employees, with a single attendance search and
+        a single leave search for the whole chunk.
+
+        :param [(<hr.employee> employee, <resource.calendar> work_schedule), ] employee_schedules:
+        :param [<datetime.date>, ] public_holiday_dates: public holidays of the period when already fetched,
+                                                         e.g. once for all the chunks of a run
+        :return {<int> employee_id: analysis_data}: see :meth:`_fetch_analysis_data`
+        """
+        result = {}
+        scheduled_employees = self.env['hr.employee']
+        for employee, work_schedule in employee_schedules:
+            day_bucketing, workday_intervals, windows = self.get_workday_windows(employee, work_schedule,
+                                                                                 date_from_str, date_to_str)
+            result[employee.id] = (day_bucketing, workday_intervals, windows, [], [])
+            if workday_intervals:
+                scheduled_employees |= employee
+        if not scheduled_employees:
+            return result
+
+        all_windows = [result[employee.id][2] for employee in scheduled_employees]
+        datetime_from = min(windows[0][0] for windows in all_windows)
+        datetime_to = max(windows[-1][1] for windows in all_windows)
+        attendance_intervals = self._get_employees_attendance_intervals(scheduled_employees, datetime_from,
+                                                                        datetime_to)
+        # Leaves are searched by date, so widen the period to cover the windows boundaries in any timezone
+        leaves_date_from_str = fields.Date.to_string(datetime_from.date() - timedelta(days=1))
+        leaves_date_to_str = fields.Date.to_string(datetime_to.date() + timedelta(days=1))
+        leave_intervals = self.env['resource.calendar'].get_resources_leave_intervals(
+            scheduled_employees.mapped('resource_id').ids, leaves_date_from_str, leaves_date_to_str,
+            include_leave_types, exclude_leave_types)
+        if public_holiday_dates is None:
+            public_holiday_dates = self.env['hr.holidays.public'].get_public_holiday_dates(leaves_date_from_str,
+                                                                                          leaves_date_to_str)
+
+        for employee in scheduled_employees:
+            day_bucketing, workday_intervals, windows = result[employee.id][:3]
+            # Public holidays out of the windows of the employee are dropped while bucketing
+            employee_leaves = leave_intervals.get(employee.resource_id.id, []) + \
+                [day_bucketing.day_bounds(holiday_date) for holiday_date in public_holiday_dates]
+            employee_leaves = sorted(employee_leaves, key=lambda leave: leave[:2])
+            result[employee.id] = (day_bucketing, workday_intervals, windows,
+                                   attendance_intervals.get(employee.id, []), employee_leaves)
+        return result
+
+    @api.model
+    def get_workday_windows(self, employee, work_schedule, date_from_str, date_to_str):
+        """
+        Gets the scheduled workdays of the period along with their windows: every workday owns a window of its
+        local day extended to its scheduled intervals, so that the whole period is fetched and bucketed once,
+        including shifts crossing midnight. Everything bucketing attendance by workday must use these windows.
+
+        :param hr.employee employee:
+        :param resource.calendar work_schedule:
+        :param str date_from_str:
+        :param str date_to_str:
+        :return (<DayBucketing> day_bucketing,
+                 [(<datetime.date> day, [(datetime.datetime, datetime.datetime), ]), ] workday_intervals,
+                 [(datetime.datetime, datetime.datetime), ] windows):
+        """
         scheduled_workdays = self.generate_scheduled_workdays(work_schedule, date_from_str, date_to_str)
-        intervals_difference = []
+        day_bucketing = self.get_day_bucketing(employee, work_schedule)
 
-        for day in scheduled_workdays:
-            day_date_str = fields.Date.to_string(day)
-            # workday_intervals comes in the form of [[(start_datetime_obj, end_datetime_obj),]]
-            # Outer list is added due to conversion from old_api to new_api
-            workday_intervals = work_schedule._get_day_work_intervals(day)
-            LOGGER.debug("Scheduled Workday Intervals of day {}: \n{}".format(day, pprint.pformat(workday_intervals)))
+        # workday_intervals comes in the form of [(start_datetime_obj, end_datetime_obj),]
+        workday_intervals = [(day.date(), [interval[:2] for interval in work_schedule._get_day_work_intervals(day)])
+                             for day in scheduled_workdays]
+        if not workday_intervals:
+            return day_bucketing, [], []
+        LOGGER.debug('Scheduled Workday Intervals: \n%s', pprint.pformat(workday_intervals))
 
-            _attendance_intervals = self.get_attendance_dates(employee, day_date_str, day_date_str)
+        windows = day_bucketing.workday_windows(workday_intervals,
+                                                self._get_previous_workday_intervals(work_schedule, date_from_str))
+        return day_bucketing, workday_intervals, windows
 
-            actual_attendance_intervals = [(_interval[2], _interval[3]) for _interval in _attendance_intervals]
-            employee_leaves = work_schedule.get_leave_intervals_including_public_vacations(employee.resource_id.id,
-                                                                                           day_date_str, day_date_str,
-                                                                                           include_leave_types,
-                                                                                           exclude_leave_types)
+    @api.model
+    def _get_previous_workday_intervals(self, work_schedule, date_str):
+        """
+        Gets the scheduled intervals of the last workday before :param date_str:, a workday falls within a week
+        of any valid work schedule.
 
-            LOGGER.debug('Actual Attendance Intervals of Day (%s): \n%s', day,
-                         pprint.pformat(actual_attendance_intervals))
+        :param resource.calendar work_schedule:
+        :param str date_str:
+        :return (<datetime.date> day, [(datetime.datetime, datetime.datetime), ]) or None:
+        """
+        date_to = fields.Date.from_string(date_str) - timedelta(days=1)
+        date_from = date_to - timedelta(days=6)
+        scheduled_workdays = list(self.generate_scheduled_workdays(work_schedule, fields.Date.to_string(date_from),
+                                                                   fields.Date.to_string(date_to)))
+        if not scheduled_workdays:
+            return None
+        day = scheduled_workdays[-1]
+        return day.date(), [interval[:2] for interval in work_schedule._get_day_work_intervals(day)]
 
-            intervals_difference += self.compute_diff_intervals(actual_attendance_intervals, workday_intervals,
-                                                                employee_leaves)
+    @api.model
+    def _classify_analysis_data(self, analysis_data):
+        """
+        Classifies the data fetched by :meth:`_fetch_analysis_data` into extra/missing work intervals
+        :return [AnalyzedInterval, ]:
+        """
+        day_bucketing, workday_intervals, windows, attendance_intervals, employee_leaves = analysis_data
+        intervals_difference = []
+
+        actual_attendance_buckets = day_bucketing.bucket_intervals(attendance_intervals, windows)
+        leave_buckets = day_bucketing.bucket_intervals(employee_leaves, windows, clip=False)
+
+        for (day, scheduled_intervals), actual_intervals, day_leaves in zip(workday_intervals,
+                                                                             actual_attendance_buckets,
+                                                                             leave_buckets):
+            LOGGER.debug('Actual Attendance Intervals of Day (%s): \n%s', day, pprint.pformat(actual_intervals))
+            intervals_difference += self.compute_diff_intervals(actual_intervals, scheduled_intervals, day_leaves,
+                                                                day)
 
         LOGGER.debug('Total Intervals Difference Count: %s', len(intervals_difference))
         LOGGER.debug('Total Intervals Difference: \n%s', pprint.pformat(intervals_difference))
         return intervals_difference
 
+    @api.model
+    def analyze_employees_attendance(self, employees, date_from_str, date_to_str, include_leave_types=None,
+                                     exclude_leave_types=None, pipelined=False, chunk_size=PIPELINE_CHUNK_SIZE,
+                                     max_queued_chunks=PIPELINE_MAX_QUEUED_CHUNKS, cursor_factory=None):
+        """
+        Analyzes the attendance of many employees, each one based on his/her own work schedule,
+        employees without a work schedule are skipped. The checks and leaves of every chunk of
+        :param chunk_size: employees are fetched at once, and public holidays once for all of them.
+
+        In pipelined mode (opt-in), a background thread with its own cursor fetches the checks, leaves and
+        holidays of the next chunks while the current chunk is being classified.
+        At most :param max_queued_chunks: fetched chunks wait in memory, the fetching thread blocks until they're
+        consumed.
+        As the fetching cursor is a separate transaction, changes that aren't committed yet are not seen by it,
+        so only use it when attendance and leaves of the period aren't modified earlier in the same transaction.
+
+        :param hr.employee employees:
+        :param str date_from_str:
+        :param str date_to_str:
+        :param [<hr.holidays.status>, ] include_leave_types: see :meth:`analyze_attendance`
+        :param [<hr.holidays.status>, ] exclude_leave_types: see :meth:`analyze_attendance`
+        :param bool pipelined: whether to overlap fetching and classifying, ignored while testing unless
+                               :param cursor_factory: is given
+        :param int chunk_size: count of employees fetched at once
+        :param int max_queued_chunks: count of fetched chunks allowed to wait for classification
+        :param callable cursor_factory: returns the cursor (as a context manager) of the fetching thread,
+                                        defaults to a new cursor of the registry
+        :return {<int> employee_id: [AnalyzedInterval, ]}:
+        """
+        started_at = time.time()
+        employees = employees.filtered('resource_calendar_id')
+        employee_ids = employees.ids
+        chunks = [employee_ids[idx:idx + chunk_size] for idx in range(0, len(employee_ids), chunk_size)]
+        testing = getattr(threading.currentThread(), 'testing', False)
+        result = {}
+
+        if not pipelined or len(chunks) < 2 or (testing and cursor_factory is None):
+            public_holiday_dates = self._get_run_public_holiday_dates(date_from_str, date_to_str)
+            for chunk in chunks:
+                chunk_data = self._fetch_chunk_analysis_data([(employee, employee.resource_calendar_id)
+                                                              for employee in self.env['hr.employee'].browse(chunk)],
+                                                             date_from_str, date_to_str, include_leave_types,
+                                                             exclude_leave_types, public_holiday_dates)
+                for employee_id, analysis_data in chunk_data.items():
+                    result[employee_id] = self._classify_analysis_data(analysis_data)
+        else:
+            fetched_chunks = queue.Queue(maxsize=max(max_queued_chunks, 1))
+            stop_event = threading.Event()
+            fetcher = threading.Thread(target=self._fetch_analysis_chunks,
+                                       args=(chunks, date_from_str, date_to_str, include_leave_types,
+                                             exclude_leave_types, fetched_chunks, stop_event, cursor_factory),
+                                       name='attendance-analysis-fetcher')
+            fetcher.daemon = True
+            fetcher.start()
+            try:
+                for _chunk in chunks:
+                    chunk_data = self._get_fetched_chunk(fetched_chunks, fetcher)
+                    if isinstance(chunk_data, Exception):
+                        raise chunk_data
+                    for employee_id, analysis_data in chunk_data.items():
+                        result[employee_id] = self._classify_analysis_data(analysis_data)
+            finally:
+                stop_event.set()
+                fetcher.join()
+
+        LOGGER.info('Analyzed attendance of %s employees in %s chunks in %.2f seconds (pipelined: %s)',
+                    len(result), len(chunks), time.time() - started_at, pipelined)
+        return result
+
+    @api.model
+    def _get_run_public_holiday_dates(self, date_from_str, date_to_str):
+        """
+        Gets the public holidays of a multi-employee analysis run once for all its chunks, widened by the days
+        the workday windows and the leave search may reach out of the analyzed period.
+        :return [<datetime.date>, ]:
+        """
+        date_from = fields.Date.from_string(date_from_str) - timedelta(days=2)
+        date_to = fields.Date.from_string(date_to_str) + timedelta(days=2)
+        return self.env['hr.holidays.public'].get_public_holiday_dates(fields.Date.to_string(date_from),
+                                                                       fields.Date.to_string(date_to))
+
+    @api.model
+    def _fetch_analysis_chunks(self, chunks, date_from_str, date_to_str, include_leave_types, exclude_leave_types,
+                               fetched_chunks, stop_event, cursor_factory=None):
+        """
+        Runs in the fetching thread of :meth:`analyze_employees_attendance`, puts the analysis data of every chunk
+        of employee ids in :param fetched_chunks:, or the raised exception to be re-raised by the classifying thread.
+        """
+
+        def _put(item):
+            # Block while the queue is full, unless the classifying thread gave up
+            while not stop_event.is_set():
+                try:
+                    fetched_chunks.put(item, timeout=PIPELINE_QUEUE_TIMEOUT)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            with api.Environment.manage(), (cursor_factory or self.pool.cursor)() as cr:
+                env = api.Environment(cr, self.env.uid, self.env.context)
+                attendance_model = env['hr.attendance']
+                _include_leave_types = [leave_type.with_env(env) for leave_type in include_leave_types or []]
+                _exclude_leave_types = [leave_type.with_env(env) for leave_type in exclude_leave_types or []]
+                public_holiday_dates = attendance_model._get_run_public_holiday_dates(date_from_str, date_to_str)
+                for chunk in chunks:
+                    employees = env['hr.employee'].browse(chunk)
+                    chunk_data = attendance_model._fetch_chunk_analysis_data(
+                        [(employee, employee.resource_calendar_id) for employee in employees], date_from_str,
+                        date_to_str, _include_leave_types, _exclude_leave_types, public_holiday_dates)
+                    # Drop the fetched records, the chunk data is plain python objects
+                    env.clear()
+                    if not _put(chunk_data):
+                        return
+        except Exception as e:
+            LOGGER.exception('Fetching attendance analysis data failed')
+            _put(e)
+
+    @api.model
+    def _get_fetched_chunk(self, fetched_chunks, fetcher):
+        """
+        Waits for the next chunk fetched by :param fetcher: thread, without blocking forever if that thread died
+        before putting anything in :param fetched_chunks:
+        """
+        while True:
+            try:
+                return fetched_chunks.get(timeout=PIPELINE_QUEUE_TIMEOUT)
+            except queue.Empty:
+                if not fetcher.is_alive() and fetched_chunks.empty():
+                    raise exceptions.ValidationError(_('Fetching attendance analysis data stopped unexpectedly.'))
+
     @api.model
     def validate_interval(self, interval):
         # if len(interval) != 2:
@@ -182,7 +504,7 @@ class Attendance(models.Model):
         return True
 
     @api.model
-    def compute_diff_intervals(self, actual_intervals, scheduled_intervals, employee_leaves):
+    def compute_diff_intervals(self, actual_intervals, scheduled_intervals, employee_leaves, day=None):
         """
         Breaks down work/attendance/leave intervals into smaller intervals and categorizes each one
         with respect to employee attendance into 3 categories:
@@ -192,6 +514,7 @@ class Attendance(models.Model):
         :param [(datetime.datetime, datetime.datetime), ] actual_intervals:
         :param [(datetime.datetime, datetime.datetime), ] scheduled_intervals:
         :param [(datetime.datetime, datetime.datetime), ] employee_leaves:
+        :param datetime.date day: the workday the intervals belong to, defaults to the date of each interval
         :return:
         """
         _employee_leave_intervals = [leave[:2] for leave in employee_leaves]
@@ -213,11 +536,12 @@ class Attendance(models.Model):
             nesting_leave_interval = self._get_nesting_intervals(sub_interval, employee_leaves)
 
             if nesting_actual_interval and not nesting_scheduled_interval and not nesting_leave_interval:
-                diff_intervals.append(AnalyzedInterval(P_VE, sub_interval))
+                diff_intervals.append(AnalyzedInterval(P_VE, sub_interval, day=day))
             elif not nesting_actual_interval and nesting_scheduled_interval and not nesting_leave_interval:
-                diff_intervals.append(AnalyzedInterval(N_VE, sub_interval))
+                diff_intervals.append(AnalyzedInterval(N_VE, sub_interval, day=day))
             elif not nesting_actual_interval and nesting_scheduled_interval and nesting_leave_interval:
-                diff_intervals.append(AnalyzedInterval(LEAVE_COVERED, sub_interval, nesting_leave_interval[0]))
+                diff_intervals.append(AnalyzedInterval(LEAVE_COVERED, sub_interval, nesting_leave_interval[0],
+                                                         day=day))
 
         LOGGER.debug('Difference Intervals: \n%s', pprint.pformat(diff_intervals))
         return diff_intervals
@@ -0,0 +1,361 @@
+import logging
+import pprint
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+from ..classes.analyzed_period import N_VE, P_VE, LEAVE_COVERED
+
+LOGGER = logging.getLogger(__name__)
+
+# Maps every analyzed state to its (daily field, cumulative field) pair on the ledger
+LEDGER_FIELDS = {
+    P_VE: ('extra_minutes', 'cumulative_extra_minutes'),
+    N_VE: ('missing_minutes', 'cumulative_missing_minutes'),
+    LEAVE_COVERED: ('leave_covered_minutes', 'cumulative_leave_covered_minutes'),
+}
+
+
+class AttendanceLedger(models.Model):
+    """
+    Per-employee cumulative ledger of the daily analyzed attendance minutes.
+
+    Each row holds the minutes of one day along with the running totals (prefix sums) up to and including
+    that day, so the balance of any period is the difference between two rows instead of a fresh
+    :meth:`hr.attendance.analyze_attendance` over the whole period.
+    """
+    _name = 'hr.attendance.ledger'
+    _description = 'Attendance Balance Ledger'
+    _order = 'employee_id, date'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, index=True, ondelete='cascade')
+    date = fields.Date(string='Date', required=True, index=True)
+    extra_minutes = fields.Float(string='Extra Minutes')
+    missing_minutes = fields.Float(string='Missing Minutes')
+    leave_covered_minutes = fields.Float(string='Leave-Covered Minutes')
+    cumulative_extra_minutes = fields.Float(string='Cumulative Extra Minutes')
+    cumulative_missing_minutes = fields.Float(string='Cumulative Missing Minutes')
+    cumulative_leave_covered_minutes = fields.Float(string='Cumulative Leave-Covered Minutes')
+
+    _sql_constraints = [
+        ('employee_date_uniq', 'unique(employee_id, date)', 'Only one ledger entry is allowed per employee per day.'),
+    ]
+
+    @staticmethod
+    def _get_daily_minutes(analyzed_intervals):
+        """
+        Sums up the minutes of :param analyzed_intervals: per day and state
+
+        :param [AnalyzedInterval, ] analyzed_intervals:
+        :return {<datetime.date> day: {<str> state: <float> minutes}, }:
+        """
+        daily_minutes = {}
+        for _interval in analyzed_intervals:
+            day_minutes = daily_minutes.setdefault(_interval.date_of_interval, dict.fromkeys(LEDGER_FIELDS, 0.0))
+            day_minutes[_interval.state] += _interval.period_in_minutes
+        return daily_minutes
+
+    @staticmethod
+    def _get_work_schedule(employee):
+        return employee.resource_calendar_id
+
+    @api.model
+    def _get_previous_entry(self, employee, date_str):
+        """
+        Gets the latest ledger entry of :param employee: strictly before :param date_str:
+        :return hr.attendance.ledger:
+        """
+        return self.search([('employee_id', '=', employee.id), ('date', '<', date_str)], order='date desc', limit=1)
+
+    @api.model
+    def _get_last_entry(self, employee, date_str):
+        """
+        Gets the latest ledger entry of :param employee: on or before :param date_str:
+        :return hr.attendance.ledger:
+        """
+        return self.search([('employee_id', '=', employee.id), ('date', '<=', date_str)], order='date desc', limit=1)
+
+    @api.model
+    def _shift_cumulative_minutes(self, employee, date_str, deltas):
+        """
+        Adds :param deltas: to the running totals of all ledger entries of :param employee: after :param date_str:
+
+        :param {<str> state: <float> minutes} deltas:
+        """
+        assignments = ', '.join('{0} = {0} + %s'.format(LEDGER_FIELDS[state][1]) for state in LEDGER_FIELDS)
+        params = [deltas[state] for state in LEDGER_FIELDS] + [employee.id, date_str]
+        self.env.cr.execute('UPDATE hr_attendance_ledger SET ' + assignments +
+                            ' WHERE employee_id = %s AND date > %s', params)
+        self.invalidate_cache(fnames=[cumulative_field for _daily_field, cumulative_field in LEDGER_FIELDS.values()])
+
+    @staticmethod
+    def _get_ledger_coverage(employee):
+        """
+        :param hr.employee employee:
+        :return (<datetime.date> date_from, <datetime.date> date_to) or None: the period the ledger is built for
+        """
+        if not employee.attendance_ledger_date_to:
+            return None
+        return (fields.Date.from_string(employee.attendance_ledger_date_from),
+                fields.Date.from_string(employee.attendance_ledger_date_to))
+
+    @api.model
+    def rebuild_ledger(self, employee, date_from_str, date_to_str):
+        """
+        Analyzes the attendance of :param employee: from :param date_from_str: to :param date_to_str: and
+        replaces the ledger entries of that period with the result.
+
+        The ledger is kept contiguous, so a period that doesn't touch the one the ledger is built for is
+        extended to fill the gap between them.
+
+        :param hr.employee employee:
+        :param str date_from_str:
+        :param str date_to_str:
+        :return hr.attendance.ledger: ledger entries of the period
+        """
+        date_from = fields.Date.from_string(date_from_str)
+        date_to = fields.Date.from_string(date_to_str)
+        coverage = self._get_ledger_coverage(employee)
+        if coverage:
+            date_from = min(date_from, coverage[1] + timedelta(days=1))
+            date_to = max(date_to, coverage[0] - timedelta(days=1))
+            date_from_str = fields.Date.to_string(date_from)
+            date_to_str = fields.Date.to_string(date_to)
+
+        attendance_model = self.env['hr.attendance']
+        analyzed_intervals = attendance_model.analyze_attendance(employee, self._get_work_schedule(employee),
+                                                                 date_from_str, date_to_str)
+        daily_minutes = self._get_daily_minutes(analyzed_intervals)
+
+        old_entries = self.search([('employee_id', '=', employee.id),
+                                   ('date', '>=', date_from_str),
+                                   ('date', '<=', date_to_str)])
+        # Only the entries of the period are recomputed, the following ones are shifted by the change of
+        # the period total.
+        deltas = {state: -sum(old_entries.mapped(daily_field))
+                  for state, (daily_field, _cumulative_field) in LEDGER_FIELDS.items()}
+        old_entries.unlink()
+
+        previous_entry = self._get_previous_entry(employee, date_from_str)
+        running_totals = {state: previous_entry[cumulative_field] if previous_entry else 0.0
+                          for state, (_daily_field, cumulative_field) in LEDGER_FIELDS.items()}
+        for day in sorted(daily_minutes):
+            values = {'employee_id': employee.id, 'date': fields.Date.to_string(day)}
+            for state, (daily_field, cumulative_field) in LEDGER_FIELDS.items():
+                minutes = round(daily_minutes[day][state], 2)
+                running_totals[state] = round(running_totals[state] + minutes, 2)
+                deltas[state] += minutes
+                values.update({daily_field: minutes, cumulative_field: running_totals[state]})
+            self.create(values)
+
+        deltas = {state: round(delta, 2) for state, delta in deltas.items()}
+        if any(deltas.values()):
+            self._shift_cumulative_minutes(employee, date_to_str, deltas)
+        employee.sudo().write({
+            'attendance_ledger_date_from': fields.Date.to_string(min([date_from] + list(coverage or []))),
+            'attendance_ledger_date_to': fields.Date.to_string(max([date_to] + list(coverage or []))),
+        })
+
+        entries = self.search([('employee_id', '=', employee.id),
+                               ('date', '>=', date_from_str),
+                               ('date', '<=', date_to_str)])
+        LOGGER.debug('Ledger entries of %s from %s to %s: \n%s', employee, date_from_str, date_to_str,
+                     pprint.pformat(entries))
+        return entries
+
+    @api.model
+    def update_ledger_day(self, employee, day):
+        """
+        Re-analyzes a single :param day: of :param employee: and applies the difference to the ledger,
+        shifting the running totals of the following entries instead of rebuilding them.
+
+        :param hr.employee employee:
+        :param datetime.date day:
+        """
+        day_str = fields.Date.to_string(day)
+        attendance_model = self.env['hr.attendance']
+        analyzed_intervals = attendance_model.analyze_attendance(employee, self._get_work_schedule(employee),
+                                                                 day_str, day_str)
+        daily_minutes = self._get_daily_minutes(analyzed_intervals).get(fields.Date.from_string(day_str),
+                                                                       dict.fromkeys(LEDGER_FIELDS, 0.0))
+
+        entry = self.search([('employee_id', '=', employee.id), ('date', '=', day_str)])
+        deltas = {state: round(daily_minutes[state] - (entry[daily_field] if entry else 0.0), 2)
+                  for state, (daily_field, _cumulative_field) in LEDGER_FIELDS.items()}
+        if not any(deltas.values()):
+            return
+
+        if not any(daily_minutes.values()):
+            entry.unlink()
+        else:
+            previous_entry = self._get_previous_entry(employee, day_str)
+            values = {}
+            for state, (daily_field, cumulative_field) in LEDGER_FIELDS.items():
+                previous_total = previous_entry[cumulative_field] if previous_entry else 0.0
+                values[daily_field] = round(daily_minutes[state], 2)
+                values[cumulative_field] = round(previous_total + daily_minutes[state], 2)
+            if entry:
+                entry.write(values)
+            else:
+                values.update({'employee_id': employee.id, 'date': day_str})
+                self.create(values)
+
+        self._shift_cumulative_minutes(employee, day_str, deltas)
+        LOGGER.debug('Ledger of %s updated on %s by %s', employee, day_str, deltas)
+
+    @api.model
+    def update_ledger_days(self, employee_days):
+        """
+        Updates the ledger days of employees that already have a ledger, ledger-less employees and days the
+        ledger isn't built for yet are skipped so that recording attendance doesn't trigger any needless analysis.
+
+        Failing to update an employee never blocks the write that triggered it, the ledger of that employee
+        is instead cut before the failing day so that it gets rebuilt by the next balance query or cron run.
+
+        :param {<hr.employee> employee: {<datetime.date> day, }} employee_days:
+        """
+        ledger_model = self.sudo()
+        for employee, days in employee_days.items():
+            employee = employee.sudo()
+            coverage = self._get_ledger_coverage(employee)
+            if not coverage or not self._get_work_schedule(employee):
+                continue
+            for day in sorted(days):
+                if not coverage[0] <= day <= coverage[1]:
+                    continue
+                if not ledger_model._try_ledger_maintenance(employee, ledger_model.update_ledger_day, employee, day):
+                    ledger_model._truncate_ledger_coverage(employee, day)
+                    break
+
+    @api.model
+    def rebuild_employee_ledgers(self, employees):
+        """
+        Rebuilds the whole ledger of :param employees:, e.g. after their work schedule or timezone changed.
+        The ledger of an employee that fails to be rebuilt is dropped, to be rebuilt by the next balance query.
+        :param hr.employee employees:
+        """
+        ledger_model = self.sudo()
+        for employee in employees.sudo():
+            coverage = self._get_ledger_coverage(employee)
+            if not coverage or not self._get_work_schedule(employee):
+                continue
+            if not ledger_model._try_ledger_maintenance(employee, ledger_model.rebuild_ledger, employee,
+                                                        fields.Date.to_string(coverage[0]),
+                                                        fields.Date.to_string(coverage[1])):
+                ledger_model._truncate_ledger_coverage(employee, coverage[0])
+
+    @api.model
+    def _try_ledger_maintenance(self, employee, method, *args):
+        """
+        Runs the ledger maintenance :param method: of :param employee: in a savepoint, so that its failure
+        (e.g. invalid work schedule or attendance data) is logged and rolled back instead of being raised.
+        :return bool: whether :param method: succeeded
+        """
+        try:
+            with self.env.cr.savepoint():
+                method(*args)
+            return True
+        except Exception:
+            LOGGER.exception('Attendance ledger maintenance of %s failed, it is retried later', employee)
+            self.invalidate_cache()
+            return False
+
+    @api.model
+    def _truncate_ledger_coverage(self, employee, day):
+        """
+        Marks the ledger of :param employee: as not built from :param day: on, so that it gets rebuilt.
+        :param hr.employee employee:
+        :param datetime.date day:
+        """
+        coverage = self._get_ledger_coverage(employee)
+        if not coverage or day > coverage[1]:
+            return
+        if day <= coverage[0]:
+            self.search([('employee_id', '=', employee.id)]).unlink()
+            employee.sudo().write({'attendance_ledger_date_from': False, 'attendance_ledger_date_to': False})
+        else:
+            employee.sudo().write({'attendance_ledger_date_to': fields.Date.to_string(day - timedelta(days=1))})
+
+    @api.model
+    def extend_ledger(self, employee, date_from_str, date_to_str):
+        """
+        Builds the ledger of :param employee: for the days from :param date_from_str: to :param date_to_str:
+        that it isn't built for yet, days after today are never built as they have no attendance to analyze.
+
+        :param hr.employee employee:
+        :param str date_from_str:
+        :param str date_to_str:
+        """
+        date_from = fields.Date.from_string(date_from_str)
+        date_to = min(fields.Date.from_string(date_to_str), fields.Date.from_string(fields.Date.context_today(self)))
+        if date_from > date_to or not self._get_work_schedule(employee):
+            return
+
+        ledger_model = self.sudo()
+        coverage = self._get_ledger_coverage(employee)
+        if not coverage:
+            ledger_model.rebuild_ledger(employee, fields.Date.to_string(date_from), fields.Date.to_string(date_to))
+            return
+        if date_from < coverage[0]:
+            ledger_model.rebuild_ledger(employee, fields.Date.to_string(date_from),
+                                        fields.Date.to_string(coverage[0] - timedelta(days=1)))
+        if date_to > coverage[1]:
+            ledger_model.rebuild_ledger(employee, fields.Date.to_string(coverage[1] + timedelta(days=1)),
+                                        fields.Date.to_string(date_to))
+
+    @api.model
+    def _cron_extend_ledgers(self):
+        """
+        Extends the ledgers of all employees up to yesterday, so that workdays without any attendance record
+        get their missing minutes without waiting for a balance query. Each employee is extended on its own, so
+        one employee's invalid data doesn't roll back the others.
+        """
+        yesterday = fields.Date.from_string(fields.Date.context_today(self)) - timedelta(days=1)
+        yesterday_str = fields.Date.to_string(yesterday)
+        employees = self.env['hr.employee'].search([('attendance_ledger_date_to', '<', yesterday_str)])
+        for employee in employees:
+            # A failing employee keeps its coverage and is retried on the next run
+            self._try_ledger_maintenance(employee, self.extend_ledger, employee, employee.attendance_ledger_date_from,
+                                         yesterday_str)
+
+    @api.model
+    def get_ledger_balance(self, employee, date_from_str, date_to_str):
+        """
+        Gets the total minutes of each analyzed state of :param employee: from :param date_from_str:
+        to :param date_to_str: (both inclusive) out of the ledger running totals.
+
+        Days of the period the ledger isn't built for yet are analyzed and added to the ledger first, so that
+        the totals are never partial.
+
+        :param hr.employee employee:
+        :param str date_from_str:
+        :param str date_to_str:
+        :return {<str> state: <float> minutes}:
+        """
+        self.extend_ledger(employee, date_from_str, date_to_str)
+        last_entry = self._get_last_entry(employee, date_to_str)
+        previous_entry = self._get_previous_entry(employee, date_from_str)
+        balance = {}
+        for state, (_daily_field, cumulative_field) in LEDGER_FIELDS.items():
+            upper_total = last_entry[cumulative_field] if last_entry else 0.0
+            lower_total = previous_entry[cumulative_field] if previous_entry else 0.0
+            balance[state] = round(upper_total - lower_total, 2)
+
+        LOGGER.debug('Ledger balance of %s from %s to %s: %s', employee, date_from_str, date_to_str, balance)
+        return balance
+
+    @staticmethod
+    def get_days_of_interval(date_from, date_to):
+        """
+        Gets all days that the interval from :param date_from: to :param date_to: may be analyzed on,
+        including a day around it, as local days and night shifts may differ from its UTC dates by a day.
+        :param datetime.datetime date_from:
+        :param datetime.datetime date_to:
+        :return {datetime.date, }:
+        """
+        day, last_day = date_from.date() - timedelta(days=1), (date_to or date_from).date() + timedelta(days=1)
+        days = set()
+        while day <= last_day:
+            days.add(day)
+            day += timedelta(days=1)
+        return days
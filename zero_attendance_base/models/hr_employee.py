@@ -1,9 +1,8 @@
 import logging
 import pprint
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 
-from dateutil import rrule
-from odoo import models, fields, _, exceptions, api
+from odoo import models, fields, api
 
 LOGGER = logging.getLogger(__name__)
 
@@ -12,6 +11,18 @@ class Employee(models.Model):
     """ Inherited Employee Model """
     _inherit = 'hr.employee'
 
+    attendance_ledger_date_from = fields.Date(string='Attendance Ledger Start', copy=False, readonly=True,
+                                              help='First day the attendance balance ledger is built for.')
+    attendance_ledger_date_to = fields.Date(string='Attendance Ledger End', copy=False, readonly=True,
+                                            help='Last day the attendance balance ledger is built for.')
+
+    @api.multi
+    def write(self, vals):
+        result = super(Employee, self).write(vals)
+        if 'resource_calendar_id' in vals or 'tz' in vals:
+            self.env['hr.attendance.ledger'].rebuild_employee_ledgers(self)
+        return result
+
     # fixme: move these methods to attendance model, I think it is the right place to manipulate attendance
     @api.multi
     def count_uncovered_missing_attendance_hours(self, work_schedule, date_from_str, date_to_str):
@@ -52,36 +63,34 @@ class Employee(models.Model):
         """
         self.ensure_one()
         attendance_model = self.env['hr.attendance']
-        _weekdays = work_schedule._get_weekdays()
-
-        if _weekdays:
-            weekdays = _weekdays
-            LOGGER.debug('Weekdays: %s', weekdays)
-        else:
-            raise exceptions.ValidationError(_('No valid Work Schedule found.'))
 
-        date_from = fields.Date.from_string(date_from_str)
-        date_to = fields.Date.from_string(date_to_str)
-
-        # An iterable that represents the days an employee has to attend from date_from to date_to
-        # based on work schedule
-        scheduled_workdays = rrule.rrule(rrule.DAILY, dtstart=date_from, wkst=rrule.SU,
-                                         until=date_to, byweekday=weekdays)
-        LOGGER.debug('Scheduled Workdays Count: %s', scheduled_workdays.count())
+        # Checks are bucketed into the same workday windows as in attendance analysis, so that a check of
+        # a shift crossing midnight is attended on the workday of the shift
+        day_bucketing, workday_intervals, windows = attendance_model.get_workday_windows(self, work_schedule,
+                                                                                         date_from_str, date_to_str)
+        LOGGER.debug('Scheduled Workdays Count: %s', len(workday_intervals))
 
         absent_workdays = []
-
-        for day in scheduled_workdays:
-            datetime_start_str = fields.Datetime.to_string(datetime.combine(day, time(0, 0)))
-            datetime_stop_str = fields.Datetime.to_string(datetime.combine(day, time(23, 59)))
-
-            workday = attendance_model.search([('employee_id', '=', self.id),
-                                               ('check_in', '>=', datetime_start_str),
-                                               ('check_in', '<=', datetime_stop_str)])
-            LOGGER.debug('Actual Attendance: %s', workday)
-
-            if len(workday) == 0:
-                absent_workdays.append(day)
+        if not workday_intervals:
+            return absent_workdays
+
+        attendances = attendance_model.search([('employee_id', '=', self.id),
+                                               ('check_in', '>=', fields.Datetime.to_string(windows[0][0] -
+                                                                                            timedelta(days=1))),
+                                               ('check_in', '<', fields.Datetime.to_string(windows[-1][1]))],
+                                              order='check_in')
+        LOGGER.debug('Actual Attendance: %s', attendances)
+        # A check that isn't checked out yet is attended only at its check-in
+        attendance_intervals = []
+        for attendance in attendances:
+            check_in = fields.Datetime.from_string(attendance.check_in)
+            check_out = fields.Datetime.from_string(attendance.check_out) if attendance.check_out else None
+            attendance_intervals.append((check_in, max(check_out or check_in, check_in + timedelta(seconds=1))))
+        attendance_buckets = day_bucketing.bucket_intervals(attendance_intervals, windows)
+
+        for (day, _scheduled_intervals), attendance_bucket in zip(workday_intervals, attendance_buckets):
+            if not attendance_bucket:
+                absent_workdays.append(datetime.combine(day, time(0, 0)))
 
         LOGGER.debug('Total Absent Workdays Count: %s', len(absent_workdays))
         LOGGER.debug('Total Absent Workdays: \n%s', pprint.pformat(absent_workdays))
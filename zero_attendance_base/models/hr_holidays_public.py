@@ -13,16 +13,40 @@ class PublicHoliday(models.Model):
     _inherit = 'hr.holidays.public'
 
     @api.model
-    def get_public_holidays(self, date_from_str, date_to_str):
+    def get_public_holidays(self, date_from_str, date_to_str, day_bucketing=None):
         """
         Get public holidays that fall between :param date_from_str and :param date_to_str
         
         :param <str> date_from_str: a date-formatted string
         :param <str> date_to_str:a date-formatted string
+        :param <DayBucketing> day_bucketing: when given, each holiday spans the UTC boundaries of its local day
         :return: [(<datetime.datetime> date_from, <datetime.datetime> date_to), ] Public Holiday Intervals
         """
         public_holidays = []
 
+        for holiday_date in self.get_public_holiday_dates(date_from_str, date_to_str):
+            if day_bucketing:
+                public_holidays.append(day_bucketing.day_bounds(holiday_date))
+            else:
+                _date_form = (datetime.combine(holiday_date, time(0, 0, 0)))
+                _date_to = (datetime.combine(holiday_date, time(23, 59, 59)))
+                public_holidays.append((_date_form, _date_to))
+
+        LOGGER.debug("All matching public holidays: \n{}".format(pformat(public_holidays)))
+        return public_holidays
+
+    @api.model
+    def get_public_holiday_dates(self, date_from_str, date_to_str):
+        """
+        Get the dates of public holidays that fall between :param date_from_str and :param date_to_str,
+        they don't depend on any employee so they can be fetched once for many employees.
+
+        :param <str> date_from_str: a date-formatted string
+        :param <str> date_to_str:a date-formatted string
+        :return: [<datetime.date>, ] Public Holiday Dates
+        """
+        holiday_dates = []
+
         date_from = fields.Datetime.from_string(date_from_str)
         date_to = fields.Datetime.from_string(date_to_str)
         years = range(date_from.year, date_to.year + 1)
@@ -31,11 +55,52 @@ class PublicHoliday(models.Model):
         for year in years:
             holidays = self.get_holidays_list(year)
             for holiday in holidays:
-                if date_from_str <= holiday.date <= date_to_str:
+                holiday_date = fields.Date.from_string(holiday.date)
+                if date_from.date() <= holiday_date <= date_to.date():
                     LOGGER.debug("Public holiday matched: {}".format(holiday))
-                    _date_form = (datetime.combine(date_from, time(0, 0, 0)))
-                    _date_to = (datetime.combine(date_to, time(23, 59, 59)))
-                    public_holidays.append((_date_form, _date_to))
+                    holiday_dates.append(holiday_date)
+        return holiday_dates
 
-        LOGGER.debug("All matching public holidays: \n{}".format(pformat(public_holidays)))
-        return public_holidays
+
+class PublicHolidayLine(models.Model):
+    _inherit = 'hr.holidays.public.line'
+
+    @api.model
+    def _update_attendance_ledgers(self, holiday_dates):
+        """
+        Updates the attendance ledger days around :param holiday_dates: for all employees having a ledger
+        :param [<datetime.date>, ] holiday_dates:
+        """
+        ledger_model = self.env['hr.attendance.ledger']
+        days = set()
+        for holiday_date in holiday_dates:
+            holiday_datetime = datetime.combine(holiday_date, time(0, 0, 0))
+            days.update(ledger_model.get_days_of_interval(holiday_datetime, holiday_datetime))
+        if not days:
+            return
+        employees = self.env['hr.employee'].sudo().search([('attendance_ledger_date_to', '!=', False)])
+        ledger_model.update_ledger_days({employee: days for employee in employees})
+
+    @api.multi
+    def _get_holiday_dates(self):
+        return {fields.Date.from_string(holiday.date) for holiday in self}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        holidays = super(PublicHolidayLine, self).create(vals_list)
+        self._update_attendance_ledgers(holidays._get_holiday_dates())
+        return holidays
+
+    @api.multi
+    def write(self, vals):
+        holiday_dates = self._get_holiday_dates()
+        result = super(PublicHolidayLine, self).write(vals)
+        self._update_attendance_ledgers(holiday_dates | self._get_holiday_dates())
+        return result
+
+    @api.multi
+    def unlink(self):
+        holiday_dates = self._get_holiday_dates()
+        result = super(PublicHolidayLine, self).unlink()
+        self._update_attendance_ledgers(holiday_dates)
+        return result
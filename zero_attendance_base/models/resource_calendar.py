@@ -10,6 +10,15 @@ class ResourceCalendar(models.Model):
     """Resource Inherited Model"""
     _inherit = 'resource.calendar'
 
+    @api.multi
+    def write(self, vals):
+        result = super(ResourceCalendar, self).write(vals)
+        if 'attendance_ids' in vals or 'tz' in vals:
+            employees = self.env['hr.employee'].sudo().search([('resource_calendar_id', 'in', self.ids),
+                                                               ('attendance_ledger_date_to', '!=', False)])
+            self.env['hr.attendance.ledger'].rebuild_employee_ledgers(employees)
+        return result
+
     @staticmethod
     def _extract_interval(leave):
         """
@@ -42,8 +51,21 @@ class ResourceCalendar(models.Model):
                                                              :param date_from: to :param date_to:
         :return: list of leave intervals
         """
+        return self.get_resources_leave_intervals([resource_id], date_from, date_to, include_leave_types,
+                                                  exclude_leave_types).get(resource_id, [])
+
+    # TODO: I think this method should be in resource.calendar.leave model
+    @api.model
+    def get_resources_leave_intervals(self, resource_ids, date_from, date_to, include_leave_types=None,
+                                      exclude_leave_types=None):
+        """
+        Same as :meth:`get_leave_intervals` for many resources (employees) at once, with a single search.
+
+        :param [<int>, ] resource_ids:
+        :return: {<int> resource_id: [(<datetime.datetime> date_from, <datetime.datetime> date_to), ]}
+        """
         calendar_leaves_model = self.env['resource.calendar.leaves']
-        domain = [('resource_id', '=', resource_id),
+        domain = [('resource_id', 'in', list(resource_ids)),
                   '|',
                   '&', ('date_from', '<', date_from),
                   ('date_to', '>', date_to),
@@ -65,12 +87,15 @@ class ResourceCalendar(models.Model):
 
         approved_leaves = calendar_leaves_model.search(domain)
 
-        return map(self._extract_interval, approved_leaves)
+        leave_intervals = {}
+        for leave in approved_leaves:
+            leave_intervals.setdefault(leave.resource_id.id, []).append(self._extract_interval(leave))
+        return leave_intervals
 
     # TODO: I think this method should be in resource.calendar.leave model
     @api.model
     def get_leave_intervals_including_public_vacations(self, resource_id, date_from, date_to, include_leave_types=None,
-                                                       exclude_leave_types=None):
+                                                       exclude_leave_types=None, day_bucketing=None):
         """
         Includes public vacations, as intervals, to normal leaves.
 
@@ -87,11 +112,12 @@ class ResourceCalendar(models.Model):
         :param [<hr.holidays.status>, ] exclude_leave_types: leave types to exclude, so that don't fetch
                                                              leaves of such types in the given interval from
                                                              :param date_from: to :param date_to:
+        :param DayBucketing day_bucketing: localizes public vacations to the UTC boundaries of their local days
         :rtype: [(<datetime.datetime> date_from, <datetime.datetime> date_to), ]
         """
         public_holidays_model = self.env['hr.holidays.public']
-        public_holidays = public_holidays_model.get_public_holidays(date_from, date_to)
-        leaves = self.get_leave_intervals(resource_id, date_from, date_to)
+        public_holidays = public_holidays_model.get_public_holidays(date_from, date_to, day_bucketing)
+        leaves = self.get_leave_intervals(resource_id, date_from, date_to, include_leave_types, exclude_leave_types)
 
         LOGGER.debug('Normal holiday intervals from %s to %s: \n%s', date_from, date_to,
                      pprint.pformat(leaves))
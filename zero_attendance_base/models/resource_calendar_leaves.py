@@ -0,0 +1,46 @@
+from odoo import models, fields, api
+
+
+class ResourceCalendarLeaves(models.Model):
+    """Resource Calendar Leaves Inherited Model"""
+    _inherit = 'resource.calendar.leaves'
+
+    @api.multi
+    def _get_ledger_days(self):
+        """
+        Gets the days touched by the leaves grouped by employee, leaves that aren't attached to a resource
+        are skipped as they are never fetched by :meth:`resource.calendar.get_leave_intervals`
+        :return {<hr.employee> employee: {<datetime.date> day, }}:
+        """
+        ledger_model = self.env['hr.attendance.ledger']
+        employee_model = self.env['hr.employee'].with_context(active_test=False)
+        employee_days = {}
+        for leave in self.filtered('resource_id'):
+            employees = employee_model.search([('resource_id', '=', leave.resource_id.id)])
+            days = ledger_model.get_days_of_interval(fields.Datetime.from_string(leave.date_from),
+                                                     fields.Datetime.from_string(leave.date_to))
+            for employee in employees:
+                employee_days.setdefault(employee, set()).update(days)
+        return employee_days
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        leaves = super(ResourceCalendarLeaves, self).create(vals_list)
+        self.env['hr.attendance.ledger'].update_ledger_days(leaves._get_ledger_days())
+        return leaves
+
+    @api.multi
+    def write(self, vals):
+        employee_days = self._get_ledger_days()
+        result = super(ResourceCalendarLeaves, self).write(vals)
+        for employee, days in self._get_ledger_days().items():
+            employee_days.setdefault(employee, set()).update(days)
+        self.env['hr.attendance.ledger'].update_ledger_days(employee_days)
+        return result
+
+    @api.multi
+    def unlink(self):
+        employee_days = self._get_ledger_days()
+        result = super(ResourceCalendarLeaves, self).unlink()
+        self.env['hr.attendance.ledger'].update_ledger_days(employee_days)
+        return result
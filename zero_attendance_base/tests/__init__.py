@@ -0,0 +1,4 @@
+from . import test_day_bucketing
+from . import test_attendance_ledger
+from . import test_attendance_pipeline
+from . import test_absent_workdays
@@ -0,0 +1,32 @@
+from odoo.tests.common import TransactionCase
+
+
+class AttendanceTestCase(TransactionCase):
+    """Common fixtures of attendance analysis tests, all in UTC"""
+
+    def setUp(self):
+        super(AttendanceTestCase, self).setUp()
+        self.attendance_model = self.env['hr.attendance']
+
+    def _create_work_schedule(self, name, hour_from=8.0, hour_to=16.0):
+        """
+        Creates a work schedule from Monday to Friday, from :param hour_from: to :param hour_to: every day
+        """
+        return self.env['resource.calendar'].create({
+            'name': name,
+            'tz': 'UTC',
+            'attendance_ids': [(0, 0, {'name': 'Workday %s' % dayofweek, 'dayofweek': str(dayofweek),
+                                       'hour_from': hour_from, 'hour_to': hour_to}) for dayofweek in range(5)],
+        })
+
+    def _create_employee(self, name, work_schedule):
+        return self.env['hr.employee'].create({
+            'name': name,
+            'tz': 'UTC',
+            'resource_calendar_id': work_schedule.id,
+        })
+
+    def _create_attendance(self, employee, check_in, check_out=False):
+        return self.attendance_model.create({'employee_id': employee.id,
+                                             'check_in': check_in,
+                                             'check_out': check_out})
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from .common import AttendanceTestCase
+
+
+class TestAbsentWorkdays(AttendanceTestCase):
+
+    def setUp(self):
+        super(TestAbsentWorkdays, self).setUp()
+        self.work_schedule = self._create_work_schedule('Absence Schedule')
+        self.employee = self._create_employee('Absence Employee', self.work_schedule)
+
+    def test_absent_workdays(self):
+        # 2019-07-01 is a Monday, the second check isn't checked out yet
+        self._create_attendance(self.employee, '2019-07-02 08:00:00', '2019-07-02 16:00:00')
+        self._create_attendance(self.employee, '2019-07-04 08:00:00')
+
+        absent_workdays = self.employee.get_absent_workdays(self.work_schedule, '2019-07-01', '2019-07-05')
+        self.assertEqual(absent_workdays, [datetime(2019, 7, 1), datetime(2019, 7, 3), datetime(2019, 7, 5)])
+
+    def test_absent_workdays_match_analysis(self):
+        # A check outside the scheduled hours still makes its workday attended in both
+        self._create_attendance(self.employee, '2019-07-02 20:00:00', '2019-07-02 23:30:00')
+
+        absent_workdays = self.employee.get_absent_workdays(self.work_schedule, '2019-07-01', '2019-07-03')
+        analyzed_intervals = self.attendance_model.analyze_attendance(self.employee, self.work_schedule,
+                                                                      '2019-07-01', '2019-07-03')
+        attended_days = {_interval.date_of_interval for _interval in analyzed_intervals if _interval.state == '+ve'}
+        self.assertEqual(attended_days, {datetime(2019, 7, 2).date()})
+        self.assertNotIn(datetime(2019, 7, 2), absent_workdays)
+        self.assertEqual(len(absent_workdays), 2)
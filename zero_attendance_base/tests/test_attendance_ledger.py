@@ -0,0 +1,100 @@
+from datetime import date
+
+from ..classes.analyzed_period import N_VE, P_VE, LEAVE_COVERED
+from .common import AttendanceTestCase
+
+
+class TestAttendanceLedger(AttendanceTestCase):
+
+    def setUp(self):
+        super(TestAttendanceLedger, self).setUp()
+        self.ledger_model = self.env['hr.attendance.ledger']
+        # 8 hours a day from Monday to Friday
+        self.work_schedule = self._create_work_schedule('Ledger Schedule')
+        self.employee = self._create_employee('Ledger Employee', self.work_schedule)
+
+    def _assert_matches_rebuild(self, date_from_str, date_to_str):
+        """
+        Asserts the incrementally updated ledger balance equals the balance of a rebuilt ledger
+        """
+        incremental_balance = self.ledger_model.get_ledger_balance(self.employee, date_from_str, date_to_str)
+        self.ledger_model.rebuild_ledger(self.employee, date_from_str, date_to_str)
+        rebuilt_balance = self.ledger_model.get_ledger_balance(self.employee, date_from_str, date_to_str)
+        self.assertEqual(incremental_balance, rebuilt_balance)
+        return rebuilt_balance
+
+    def test_rebuild_ledger(self):
+        # 2019-07-01 is a Monday
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-01', '2019-07-05')
+        balance = self.ledger_model.get_ledger_balance(self.employee, '2019-07-01', '2019-07-05')
+        self.assertEqual(balance, {P_VE: 0.0, N_VE: 5 * 480.0, LEAVE_COVERED: 0.0})
+        self.assertEqual(self.ledger_model.get_ledger_balance(self.employee, '2019-07-02', '2019-07-03')[N_VE],
+                         2 * 480.0)
+
+    def test_incremental_update_matches_rebuild(self):
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-01', '2019-07-05')
+
+        self._create_attendance(self.employee, '2019-07-02 08:00:00', '2019-07-02 12:00:00')
+        overtime = self._create_attendance(self.employee, '2019-07-03 08:00:00', '2019-07-03 18:00:00')
+        # A night shift crossing midnight into a workday
+        self._create_attendance(self.employee, '2019-07-04 22:00:00', '2019-07-05 02:00:00')
+        balance = self._assert_matches_rebuild('2019-07-01', '2019-07-05')
+        self.assertEqual(balance[N_VE], 3 * 480.0 + 240.0)
+        self.assertEqual(balance[P_VE], 120.0 + 240.0)
+        self._assert_matches_rebuild('2019-07-03', '2019-07-04')
+
+        overtime.write({'check_out': '2019-07-03 16:00:00'})
+        balance = self._assert_matches_rebuild('2019-07-01', '2019-07-05')
+        self.assertEqual(balance[P_VE], 240.0)
+
+        overtime.unlink()
+        balance = self._assert_matches_rebuild('2019-07-01', '2019-07-05')
+        self.assertEqual(balance[N_VE], 4 * 480.0 + 240.0)
+
+    def test_balance_extends_past_built_period(self):
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-01', '2019-07-02')
+        self.assertEqual(self.employee.attendance_ledger_date_to, date(2019, 7, 2))
+
+        # Workdays after the built period have no attendance record, they must still count as missing
+        balance = self.ledger_model.get_ledger_balance(self.employee, '2019-07-01', '2019-07-05')
+        self.assertEqual(balance[N_VE], 5 * 480.0)
+        self.assertEqual(self.employee.attendance_ledger_date_from, date(2019, 7, 1))
+        self.assertEqual(self.employee.attendance_ledger_date_to, date(2019, 7, 5))
+
+        # Attendance outside the built period doesn't touch the ledger until it is extended to it
+        self._create_attendance(self.employee, '2019-07-08 08:00:00', '2019-07-08 16:00:00')
+        self.assertEqual(self.employee.attendance_ledger_date_to, date(2019, 7, 5))
+        balance = self.ledger_model.get_ledger_balance(self.employee, '2019-07-08', '2019-07-09')
+        self.assertEqual(balance[N_VE], 480.0)
+
+    def test_schedule_change_rebuilds_ledger(self):
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-01', '2019-07-05')
+        self.employee.resource_calendar_id = self._create_work_schedule('Half Day Schedule', hour_to=12.0)
+        balance = self.ledger_model.get_ledger_balance(self.employee, '2019-07-01', '2019-07-05')
+        self.assertEqual(balance[N_VE], 5 * 240.0)
+
+    def test_extend_ledger_backwards(self):
+        self._create_attendance(self.employee, '2019-07-09 08:00:00', '2019-07-09 12:00:00')
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-08', '2019-07-12')
+
+        # Building earlier days shifts the running totals of the days after them
+        balance = self.ledger_model.get_ledger_balance(self.employee, '2019-07-01', '2019-07-12')
+        self.assertEqual(balance[N_VE], 9 * 480.0 + 240.0)
+        self.assertEqual(self.ledger_model.get_ledger_balance(self.employee, '2019-07-08', '2019-07-12')[N_VE],
+                         4 * 480.0 + 240.0)
+        self._assert_matches_rebuild('2019-07-01', '2019-07-12')
+
+    def test_ledger_failure_does_not_block_writes(self):
+        self.ledger_model.rebuild_ledger(self.employee, '2019-07-01', '2019-07-05')
+
+        # A check of more than 24 hours can't be analyzed, it must still be recorded
+        self._create_attendance(self.employee, '2019-07-03 08:00:00', '2019-07-04 10:00:00')
+        self.assertEqual(self.employee.attendance_ledger_date_from, date(2019, 7, 1))
+        self.assertLess(self.employee.attendance_ledger_date_to, date(2019, 7, 3))
+
+        # A work schedule without any workday can't be analyzed, it must still be assigned
+        empty_schedule = self.env['resource.calendar'].create({'name': 'Empty Schedule', 'attendance_ids': []})
+        self.employee.resource_calendar_id = empty_schedule
+        self.assertEqual(self.employee.resource_calendar_id, empty_schedule)
+        self.assertFalse(self.employee.attendance_ledger_date_to)
+        self.assertFalse(self.ledger_model.search([('employee_id', '=', self.employee.id)]))
@@ -0,0 +1,117 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo import exceptions
+from odoo.tools import mute_logger
+
+from ..models.hr_attendance import PIPELINE_QUEUE_TIMEOUT
+from .common import AttendanceTestCase
+
+
+class TestAttendancePipeline(AttendanceTestCase):
+
+    def setUp(self):
+        super(TestAttendancePipeline, self).setUp()
+        self.work_schedule = self._create_work_schedule('Pipeline Schedule')
+        self.employees = self.env['hr.employee']
+        for idx in range(3):
+            self.employees |= self._create_employee('Pipeline Employee %s' % idx, self.work_schedule)
+        self._create_attendance(self.employees[0], '2019-07-01 07:00:00', '2019-07-01 16:00:00')
+        self._create_attendance(self.employees[1], '2019-07-02 08:00:00', '2019-07-02 12:00:00')
+        self._create_attendance(self.employees[1], '2019-07-03 22:00:00', '2019-07-04 02:00:00')
+
+    @contextmanager
+    def _test_cursor(self):
+        """
+        Lets the fetching thread use the test transaction, so that it sees the records of the test
+        """
+        yield self.env.cr
+
+    def _get_states(self, result):
+        return {employee_id: [(_interval.state, _interval.interval) for _interval in analyzed_intervals]
+                for employee_id, analyzed_intervals in result.items()}
+
+    def test_pipelined_matches_sequential(self):
+        fetching_threads = []
+        fetch_chunk_analysis_data = type(self.attendance_model)._fetch_chunk_analysis_data
+
+        def _fetch_chunk_analysis_data(model, *args, **kwargs):
+            fetching_threads.append(threading.currentThread().name)
+            return fetch_chunk_analysis_data(model, *args, **kwargs)
+
+        sequential = self.attendance_model.analyze_employees_attendance(self.employees, '2019-07-01', '2019-07-05',
+                                                                        chunk_size=1)
+        with patch.object(type(self.attendance_model), '_fetch_chunk_analysis_data', _fetch_chunk_analysis_data):
+            pipelined = self.attendance_model.analyze_employees_attendance(self.employees, '2019-07-01',
+                                                                           '2019-07-05', pipelined=True,
+                                                                           chunk_size=1, max_queued_chunks=1,
+                                                                           cursor_factory=self._test_cursor)
+
+        # Every chunk was fetched by the background thread
+        self.assertEqual(fetching_threads, ['attendance-analysis-fetcher'] * 3)
+        self.assertEqual(set(pipelined), set(self.employees.ids))
+        self.assertEqual(self._get_states(pipelined), self._get_states(sequential))
+
+    def test_pipelined_fetch_error_is_raised(self):
+        def _fetch_chunk_analysis_data(model, *args, **kwargs):
+            raise exceptions.ValidationError('Fetch failed')
+
+        with patch.object(type(self.attendance_model), '_fetch_chunk_analysis_data', _fetch_chunk_analysis_data), \
+                mute_logger('odoo.addons.zero_attendance_base.models.hr_attendance'), \
+                self.assertRaises(exceptions.ValidationError):
+            self.attendance_model.analyze_employees_attendance(self.employees, '2019-07-01', '2019-07-05',
+                                                               pipelined=True, chunk_size=1,
+                                                               cursor_factory=self._test_cursor)
+
+    def test_full_queue_blocks_fetcher(self):
+        fetched_chunks = queue.Queue(maxsize=1)
+        stop_event = threading.Event()
+        chunks = [[employee.id] for employee in self.employees]
+        fetcher = threading.Thread(target=self.attendance_model._fetch_analysis_chunks,
+                                   args=(chunks, '2019-07-01', '2019-07-05', None, None, fetched_chunks, stop_event,
+                                         self._test_cursor))
+        fetcher.daemon = True
+        fetcher.start()
+        try:
+            first_chunk = self.attendance_model._get_fetched_chunk(fetched_chunks, fetcher)
+            self.assertEqual(set(first_chunk), set(chunks[0]))
+
+            deadline = time.time() + 10 * PIPELINE_QUEUE_TIMEOUT
+            while not fetched_chunks.full() and time.time() < deadline:
+                time.sleep(0.01)
+            # The third chunk keeps waiting for the second one to be consumed, past the timeout of a single put
+            time.sleep(1.5 * PIPELINE_QUEUE_TIMEOUT)
+            self.assertTrue(fetcher.is_alive())
+            self.assertEqual(fetched_chunks.qsize(), 1)
+        finally:
+            stop_event.set()
+            fetcher.join(5 * PIPELINE_QUEUE_TIMEOUT)
+
+        # Once stopped, the fetcher gives up without queueing anything else
+        self.assertFalse(fetcher.is_alive())
+        self.assertEqual(fetched_chunks.qsize(), 1)
+        self.assertEqual(set(fetched_chunks.get_nowait()), set(chunks[1]))
+
+    def test_employees_without_work_schedule_are_skipped(self):
+        self.employees[2].resource_calendar_id = False
+        result = self.attendance_model.analyze_employees_attendance(self.employees, '2019-07-01', '2019-07-05')
+        self.assertEqual(set(result), set(self.employees[:2].ids))
+
+    def test_get_fetched_chunk(self):
+        fetched_chunks = queue.Queue(maxsize=1)
+        fetched_chunks.put(['chunk data'])
+        fetcher = threading.Thread(target=lambda: None)
+        fetcher.start()
+        fetcher.join()
+        # What the fetching thread put before it stopped is still consumed
+        self.assertEqual(self.attendance_model._get_fetched_chunk(fetched_chunks, fetcher), ['chunk data'])
+
+    def test_get_fetched_chunk_of_dead_fetcher(self):
+        fetcher = threading.Thread(target=lambda: None)
+        fetcher.start()
+        fetcher.join()
+        with self.assertRaises(exceptions.ValidationError):
+            self.attendance_model._get_fetched_chunk(queue.Queue(maxsize=1), fetcher)
@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+
+from odoo.tests.common import TransactionCase
+
+from ..classes.day_bucketing import DayBucketing
+
+
+class TestDayBucketing(TransactionCase):
+
+    def setUp(self):
+        super(TestDayBucketing, self).setUp()
+        self.utc = DayBucketing.get('UTC')
+        self.damascus = DayBucketing.get('Asia/Damascus')
+        self.berlin = DayBucketing.get('Europe/Berlin')
+
+    def test_shared_instances(self):
+        self.assertIs(DayBucketing.get('Europe/Berlin'), self.berlin)
+        self.assertIs(DayBucketing.get(None), self.utc)
+
+    def test_day_bounds(self):
+        self.assertEqual(self.utc.day_bounds(date(2019, 7, 1)),
+                         (datetime(2019, 7, 1, 0, 0), datetime(2019, 7, 2, 0, 0)))
+        self.assertEqual(self.damascus.day_bounds(date(2019, 7, 1)),
+                         (datetime(2019, 6, 30, 21, 0), datetime(2019, 7, 1, 21, 0)))
+
+    def test_dst_change(self):
+        # Clocks go forward on 2019-03-31 in Berlin, that local day is 23 hours long
+        start, stop = self.berlin.day_bounds(date(2019, 3, 31))
+        self.assertEqual((start, stop), (datetime(2019, 3, 30, 23, 0), datetime(2019, 3, 31, 22, 0)))
+        self.assertEqual(stop - start, timedelta(hours=23))
+        self.assertEqual(self.berlin.to_local(datetime(2019, 3, 31, 0, 30)), datetime(2019, 3, 31, 1, 30))
+        self.assertEqual(self.berlin.to_local(datetime(2019, 3, 31, 1, 30)), datetime(2019, 3, 31, 3, 30))
+        self.assertEqual(self.berlin.local_day(datetime(2019, 3, 31, 21, 59)), date(2019, 3, 31))
+        self.assertEqual(self.berlin.local_day(datetime(2019, 3, 31, 22, 0)), date(2019, 4, 1))
+
+    def test_split_night_shift(self):
+        pieces = self.damascus.split_by_day((datetime(2019, 7, 1, 18, 0), datetime(2019, 7, 2, 3, 0)))
+        self.assertEqual(pieces, [
+            (date(2019, 7, 1), datetime(2019, 7, 1, 18, 0), datetime(2019, 7, 1, 21, 0)),
+            (date(2019, 7, 2), datetime(2019, 7, 1, 21, 0), datetime(2019, 7, 2, 3, 0)),
+        ])
+
+    def test_night_shift_windows(self):
+        night_shifts = [(date(2024, 1, day), [(datetime(2024, 1, day, 22, 0), datetime(2024, 1, day + 1, 6, 0))])
+                        for day in (10, 11)]
+        windows = self.utc.workday_windows(night_shifts)
+        self.assertEqual(windows, [(datetime(2024, 1, 10, 0, 0), datetime(2024, 1, 11, 6, 0)),
+                                   (datetime(2024, 1, 11, 6, 0), datetime(2024, 1, 12, 6, 0))])
+
+        # The window of a single day must not depend on where the analyzed period starts
+        single_day_windows = self.utc.workday_windows(night_shifts[1:], night_shifts[0])
+        self.assertEqual(single_day_windows, windows[1:])
+
+        check = (datetime(2024, 1, 10, 22, 0), datetime(2024, 1, 11, 6, 0))
+        self.assertEqual(self.utc.bucket_intervals([check], single_day_windows), [[]])
+
+    def test_bucket_intervals_gaps(self):
+        # Windows of two workdays separated by a weekend
+        windows = [(datetime(2019, 7, 4, 0, 0), datetime(2019, 7, 5, 0, 0)),
+                   (datetime(2019, 7, 7, 0, 0), datetime(2019, 7, 8, 0, 0))]
+        in_gap = (datetime(2019, 7, 5, 9, 0), datetime(2019, 7, 5, 17, 0))
+        spanning = (datetime(2019, 7, 4, 20, 0), datetime(2019, 7, 7, 2, 0))
+        before = (datetime(2019, 7, 3, 9, 0), datetime(2019, 7, 3, 17, 0))
+
+        buckets = self.utc.bucket_intervals([before, spanning, in_gap], windows)
+        self.assertEqual(buckets, [[(datetime(2019, 7, 4, 20, 0), datetime(2019, 7, 5, 0, 0))],
+                                   [(datetime(2019, 7, 7, 0, 0), datetime(2019, 7, 7, 2, 0))]])
+
+    def test_bucket_intervals_without_clipping(self):
+        windows = [(datetime(2019, 7, 1, 0, 0), datetime(2019, 7, 2, 0, 0)),
+                   (datetime(2019, 7, 2, 0, 0), datetime(2019, 7, 3, 0, 0))]
+        leave = (datetime(2019, 7, 1, 12, 0), datetime(2019, 7, 2, 12, 0), 'covering leave data')
+
+        buckets = self.utc.bucket_intervals([leave], windows, clip=False)
+        self.assertEqual(buckets, [[leave], [leave]])
+
+        clipped_buckets = self.utc.bucket_intervals([leave], windows)
+        self.assertEqual(clipped_buckets[0], [(datetime(2019, 7, 1, 12, 0), datetime(2019, 7, 2, 0, 0),
+                                               'covering leave data')])